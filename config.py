@@ -2,6 +2,10 @@
 Misc config for the election.
 """
 
-from decimal import Decimal
+NO_PREFERENCE_RESPONSE = "No preference"
 
-NO_PREFERENCE_RESPONSE = "No preference"
\ No newline at end of file
+# Ballot weights are stored as integers in units of 1/WEIGHT_SCALE of a vote,
+# so tallying is plain int addition instead of Decimal arithmetic.
+# The scale has to be fine-grained because exec ballots get a weight of
+# (club voting mass / number of exec ballots), which is rarely a round number.
+WEIGHT_SCALE = 10**6
\ No newline at end of file
@@ -6,212 +6,305 @@ Written for UVa Club Running's Fall 2020 Exec elections.
 
 import offices
 import config
-import ballot
 import sys
 import argparse
+import array
+import contextlib
 import csv
-import re
+import gc
+import heapq
 import random
-from decimal import *
-
-getcontext().prec = 5  # 5 digits of decimal precision
 
 VERSION_STRING = "1.2"  # Version string.
 
-parser = argparse.ArgumentParser(
-    description=f"pystv v{VERSION_STRING} - ballot counter for some Club Running elections",
-    epilog="Skyler Moon is a thoughtful guy."
-)
-
-# argument for the csv file we'll read in containing all of the votes
-parser.add_argument(
-    "file",
-    metavar="input_file",
-    nargs="?",
-    help="Google Form election results data to count, stored as a csv."
-)
-
-# argument for the office we're running this election on
-parser.add_argument(
-    "office",
-    nargs="?",
-    metavar="office",
-    choices=offices.OFFICES.keys(),
-    help="the office to run an election for. List offices with --list-offices."
-)
-
-# flag indicating we should list offices and exit
-parser.add_argument(
-    "--list-offices",
-    action="store_true",
-    help="Lists the offices available to run an election for and quits."
-)
-
-# flag indicating we should skip all confirm y/n prompts
-parser.add_argument(
-    "-y",
-    action="store_true",
-    help="Answers 'yes' to all of the confirmation questions automatically. (Or 'no', when appropriate to make sure no user input is required.) Only use this if you're really confident!"
-)
-
-# argument allowing user to set the random seed the program should use
-parser.add_argument(
-    "--seed",
-    action="store",
-    default=None,
-    type=int,
-    help="Optional seed to use for the PRNG in case of a tie. If omitted, the seed will be selected based on system time."
-)
-
-# argument that makes us pause ballot counting between rounds
-parser.add_argument(
-    "--pause",
-    # Ryan Torbic suggested that the code was too fast and therefore unlike other ballot counting. This option enhances the realism significantly, and makes you really feel like you are in the great state of Nevada.
-    "--ryan-mode",
-    action="store_true",
-    help="Pauses the ballot counting in between rounds."
-)
-
-# allows preemptive elimination for candidates that are out of the race
-parser.add_argument(
-    "--elim",
-    action="store",
-    nargs="+",
-    metavar="candidate",
-    default=None,
-    type=int,
-    help="The identifiers of the candidates, if any, that should be eliminated preemptively."
-)
-
-# is it permissible for a tie in the final round to be broken by chance? default: No.
-parser.add_argument(
-    "--break-ties",
-    action="store_true",
-    help="Allows for final-round ties to be settled using random chance."
-)
-
-parser.add_argument(
-    "--exec-votes",
-    action="store",
-    metavar="exec-input-file",
-    default=None,
-    type=str,
-    # need to escape the % since argparse is formatting our help string >:(
-    # see https://thomas-cokelaer.info/blog/2014/03/python-argparse-issues-with-the-help-argument-typeerror-o-format-a-number-is-required-not-dict/
-    help="Path to file containing exec votes. When specified, exec's votes will represent 50%% of the votes."
-)
-
-args = parser.parse_args()
-
-print(f"pystv v{VERSION_STRING}")
-print("Built for Club Running by Joe Kerrigan")
-
-
-if args.list_offices:
-    # We should list offices and exit.
+
+def _build_parser():
+    """
+    Builds the command-line argument parser.
+    """
+    parser = argparse.ArgumentParser(
+        description=f"pystv v{VERSION_STRING} - ballot counter for some Club Running elections",
+        epilog="Skyler Moon is a thoughtful guy."
+    )
+
+    # argument for the csv file we'll read in containing all of the votes
+    parser.add_argument(
+        "file",
+        metavar="input_file",
+        nargs="?",
+        help="Google Form election results data to count, stored as a csv."
+    )
+
+    # argument for the office we're running this election on
+    parser.add_argument(
+        "office",
+        nargs="?",
+        metavar="office",
+        choices=offices.OFFICES.keys(),
+        help="the office to run an election for. List offices with --list-offices."
+    )
+
+    # flag indicating we should list offices and exit
+    parser.add_argument(
+        "--list-offices",
+        action="store_true",
+        help="Lists the offices available to run an election for and quits."
+    )
+
+    # flag indicating we should skip all confirm y/n prompts
+    parser.add_argument(
+        "-y",
+        action="store_true",
+        help="Answers 'yes' to all of the confirmation questions automatically. (Or 'no', when appropriate to make sure no user input is required.) Only use this if you're really confident!"
+    )
+
+    # argument allowing user to set the random seed the program should use
+    parser.add_argument(
+        "--seed",
+        action="store",
+        default=None,
+        type=int,
+        help="Optional seed to use for the PRNG in case of a tie. If omitted, the seed will be selected based on system time."
+    )
+
+    # argument that makes us pause ballot counting between rounds
+    parser.add_argument(
+        "--pause",
+        # Ryan Torbic suggested that the code was too fast and therefore unlike other ballot counting. This option enhances the realism significantly, and makes you really feel like you are in the great state of Nevada.
+        "--ryan-mode",
+        action="store_true",
+        help="Pauses the ballot counting in between rounds."
+    )
+
+    # allows preemptive elimination for candidates that are out of the race
+    parser.add_argument(
+        "--elim",
+        action="store",
+        nargs="+",
+        metavar="candidate",
+        default=None,
+        type=int,
+        help="The identifiers of the candidates, if any, that should be eliminated preemptively."
+    )
+
+    # skips printing the standings after every round
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="Only prints the final results, not the vote counts and eliminations of each round."
+    )
+
+    # is it permissible for a tie in the final round to be broken by chance? default: No.
+    parser.add_argument(
+        "--break-ties",
+        action="store_true",
+        help="Allows for final-round ties to be settled using random chance."
+    )
+
+    parser.add_argument(
+        "--exec-votes",
+        action="store",
+        metavar="exec-input-file",
+        default=None,
+        type=str,
+        # need to escape the % since argparse is formatting our help string >:(
+        # see https://thomas-cokelaer.info/blog/2014/03/python-argparse-issues-with-the-help-argument-typeerror-o-format-a-number-is-required-not-dict/
+        help="Path to file containing exec votes. When specified, exec's votes will represent 50%% of the votes."
+    )
+
+    return parser
+
+
+def _print_banner():
+    """
+    Prints the version banner shown at the start of every run.
+    """
+    print(f"pystv v{VERSION_STRING}")
+    print("Built for Club Running by Joe Kerrigan")
+
+
+def _list_offices():
+    """
+    Lists the offices available for election.
+    """
     print("Offices available for election:")
     for office in offices.OFFICES.keys():
         print(f"    {office}")
-    sys.exit(0)
 
-seed = args.seed
-if seed is None:
-    # if the user hasn't specified a seed, just come up with one randomly
-    seed = random.randrange(sys.maxsize)
 
-rng = random.Random(seed)  # initialize an rng using this seed
-print(f"(Using random seed {seed})")
+def _confirm_yn(prompt: str, assume_yes: bool, invert_flag: bool = False):
+    """
+    Helper function for confirm y/n-style prompts.
+    Will automatically approve if assume_yes is set.
 
+    assume_yes : bool := whether -y was passed.
+    invert_flag : bool := whether to return No when -y is set, instead of yes.
+    """
+    if assume_yes:
+        # if invert_flag is false, return True. else, return False
+        return (not invert_flag)
+    else:
+        return input(prompt + " [y/n] ") == "y"
 
-if args.file is None:
-    print(
-        f"FATAL: Input file is requried to run election (try {sys.argv[0]} --help)")
-    sys.exit(1)
 
-if args.office is None:
-    print(
-        f"FATAL: An office is required to run election (try {sys.argv[0]} --help)")
-    sys.exit(1)
+def _format_weight(weight: int, scale: int = config.WEIGHT_SCALE):
+    """
+    Helper function for displaying a fixed-point weight (or vote total) as a decimal number,
+    rounded to the nearest 1/config.WEIGHT_SCALE of a vote.
+
+    weight : int := weight in units of 1/scale of a vote.
+    scale : int := how many units make up one vote.
+    """
+    # round half up to the nearest 1/WEIGHT_SCALE, in integers so nothing is lost on the way.
+    rounded = (2 * weight * config.WEIGHT_SCALE + scale) // (2 * scale)
+    whole, frac = divmod(rounded, config.WEIGHT_SCALE)
+    frac_digits = len(str(config.WEIGHT_SCALE)) - 1
+    return f"{whole}.{frac:0{frac_digits}d}".rstrip("0").rstrip(".")
 
-seats = int(offices.OFFICES[args.office]["num_seats"])
-assert isinstance(seats, int)
 
-print(f"Running an election for {args.office}, which has {seats} seat(s) up for election.")
+# Ordinal responses look like "1st choice", "2nd choice," etc.
+ORDINAL_SUFFIXES = ("st", "nd", "rd", "th")
+CHOICE_SUFFIX = " choice"
 
 
-def _confirm_yn(prompt: str, invert_flag: bool = False):
+def _ordinal(n: int):
     """
-    Helper function for confirm y/n-style prompts.
-    Will automatically approve if args.y is set.
+    Helper function that spells out n the way Google Forms does, e.g. 1 -> "1st", 12 -> "12th", 23 -> "23rd".
+    """
+    if n % 10 == 1 and n % 100 != 11:
+        return f"{n}st"
+    if n % 10 == 2 and n % 100 != 12:
+        return f"{n}nd"
+    if n % 10 == 3 and n % 100 != 13:
+        return f"{n}rd"
+    return f"{n}th"
 
-    invert_flag : bool := whether to return No when -y is set, instead of yes.
+
+# "No preference" is matched case-insensitively.
+NO_PREFERENCE_LOWER = config.NO_PREFERENCE_RESPONSE.lower()
+
+
+def _parse_rank(response: str):
+    """
+    Slow path for responses missing from RANK_MAP. Returns the rank the response represents,
+    or None if the candidate was not ranked. Accepts any number with any ordinal suffix, e.g. "11st choice".
+    """
+    # if they specified no preference, then it's no big deal
+    if response.lower() == NO_PREFERENCE_LOWER:
+        return None
+    # otherwise, pick apart "<number><st|nd|rd|th> choice" by hand rather than with a regex.
+    # anything else means this candidate was not ranked
+    # (or there was an error in how the form was processed)
+    if not response.endswith(CHOICE_SUFFIX):
+        return None
+    ordinal = response[:-len(CHOICE_SUFFIX)]
+    number, suffix = ordinal[:-2], ordinal[-2:]
+    if suffix not in ORDINAL_SUFFIXES or not number.isdecimal():
+        return None
+    return int(number)  # convert their rank to a number
+
+
+class _RankMap(dict):
+    """
+    dict of response -> rank that falls back to _parse_rank (and caches the result) for
+    responses it hasn't seen, so lookups never raise KeyError.
     """
-    if args.y:
-        # if invert_flag is false, return True. else, return False
-        return (not invert_flag)
-    else:
-        return input(prompt + " [y/n] ") == "y"
 
+    def __missing__(self, response):
+        rank = self[response] = _parse_rank(response)
+        return rank
 
-# Matches the response part of Google Forms header "Question [Response]"
-CANDIDATE_REGEX = re.compile(r"^.+\[(.+)\]$")
-# Matches the numeric parts of the ordinal "1st choice", "2nd choice," etc.
-ORDINAL_REGEX = re.compile(r"^(\d+)(?:st|nd|rd|th) choice$")
 
-print("Reading election data...")
-ballots = []
-with open(args.file, "r") as csvfile:
-    reader = csv.reader(csvfile)
-    # Extract candidate names by looking at the column headers.
-    headers = next(reader)
-    # 0 - timestamp
-    # 1 to n - "Rank your choices" [Candidate Name]
-    candidates = []
-    print("Detecting candidates...")
-    for i, col in enumerate(headers[1:]):  # skip first col
-        # find matches for this column w the candidate regex
-        match = CANDIDATE_REGEX.findall(col)
-        if len(match) == 0:
-            print(
-                f"FATAL: Failed to extract candidate from header for column {i}.")
-            sys.exit(1)
-        else:
-            candidates.append(match[0])
+# Maps a ballot response to the rank it represents, or None if the candidate was not ranked.
+# Google Forms only emits a small set of response strings, so these are precomputed,
+# and _parse_rank() only handles anything unexpected.
+RANK_MAP = _RankMap({f"{_ordinal(n)} choice": n for n in range(1, 101)})
+RANK_MAP[""] = None
+# The usual spellings of "No preference" go straight into RANK_MAP,
+# so .lower() is only ever called on responses that fall through to _parse_rank.
+for no_preference in (config.NO_PREFERENCE_RESPONSE, NO_PREFERENCE_LOWER, config.NO_PREFERENCE_RESPONSE.title()):
+    RANK_MAP[no_preference] = None
 
-    print(f"Detected {len(candidates)} candidates:")
-    for i, candidate in enumerate(candidates):
-        print(f"    {i+1}. ", candidate)
-    confirm = _confirm_yn("Is this correct?")
-    if not confirm:
-        print("Exiting...")
+
+@contextlib.contextmanager
+def _gc_paused():
+    """
+    Context manager (or decorator) that turns off the cyclic garbage collector while building lots of objects.
+    The rows and rankings we build never form reference cycles, so the collector's
+    periodic passes over them are pure overhead.
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+@_gc_paused()
+def _read_csv(path: str):
+    """
+    Reads a Google Forms results csv. Returns (headers, rows). Exits if any row is malformed.
+
+    All rows are read in one batch, so the file is closed before any rankings are built.
+    """
+    with open(path, "r") as csvfile:
+        reader = csv.reader(csvfile)
+        headers = next(reader)
+        rows = list(reader)
+
+    # every response should have exactly one cell per column.
+    # check them all up front so every malformed row is reported at once.
+    # (row numbers match the spreadsheet, where the headers are row 1)
+    bad_rows = [str(i + 2) for i, row in enumerate(rows) if len(row) != len(headers)]
+    if len(bad_rows) > 0:
+        print(
+            f"FATAL: Row(s) {', '.join(bad_rows)} of {path} do not have {len(headers)} columns.")
         sys.exit(1)
+    return headers, rows
+
+
+def _extract_candidates(headers: list):
+    """
+    Extracts candidate names from the column headers.
+    0 - timestamp
+    1 to n - "Rank your choices" [Candidate Name]
+    """
+    columns = headers[1:]  # skip first col (timestamp)
+    # Google Forms headers look like "Question [Candidate Name]",
+    # so each name is sliced out from between the last '[' and the closing ']'.
+    bad_columns = [str(i + 2) for i, col in enumerate(columns)
+                   if not (col.endswith("]") and 0 < col.rfind("[") < len(col) - 2)]
+    if len(bad_columns) > 0:
+        print(
+            f"FATAL: Failed to extract candidate from header for column(s) {', '.join(bad_columns)}.")
+        sys.exit(1)
+    return [col[col.rfind("[") + 1:-1] for col in columns]
 
-    print("Initializing ballots...")
-    for i, row in enumerate(reader):
-        i += 1  # increment i because we skipped header
-        timestamp = row[0]  # extract the ballot timestamp
-
-        weight = Decimal("1.0")
-
-        ballot_choices = []  # populate their ballot ranking
-        for candidate_index, candidate_response in enumerate(row[1:]):
-            # if they specified no preference, then it's no big deal
-            if candidate_response.lower() == config.NO_PREFERENCE_RESPONSE.lower():
-                continue  # skip ranking this candidate
-
-            match = ORDINAL_REGEX.findall(candidate_response)
-            if len(match) == 0:
-                # this candidate was not ranked
-                # (or there was an error in how the form was processed)
-                continue  # skip ranking this candidate
-            else:
-                rank = int(match[0])  # convert their rank to a number
-                # append like (candidate_id, ranking)
-                ballot_choices.append((candidate_index, int(rank)))
+
+@_gc_paused()
+def _build_rankings(rows: list):
+    """
+    Builds the ballot for each response row: an array of candidate indices, most preferred first.
+
+    A ballot that ranks candidates 1 before 0 before 2 would be encoded as array("h", [1, 0, 2]).
+    """
+    new_rankings = []
+    for row in rows:
+        # populate their ballot ranking.
+        # map() runs the RANK_MAP lookups over the whole row in C;
+        # candidates whose response maps to None were not ranked and are skipped.
+        ranks = map(RANK_MAP.__getitem__, row[1:])
+        # list like (ranking, candidate_id)
+        ballot_choices = [(rank, candidate_index) for candidate_index, rank in enumerate(ranks)
+                          if rank is not None]
 
         # sort ballot choices in ascending order by rank
-        # sort by second entry in tuple - their rank
-        ballot_choices.sort(key=lambda x: x[1])
+        # rank is the first entry in the tuple, so plain tuple comparison (done in C) does it
+        # without a key function. equal ranks fall back to candidate_id, i.e. ballot order.
+        ballot_choices.sort()
 
         # toDONE: Python sort is stable, so if two candidates A and B are ranked equally, they will always
         # end up receiving votes preferring whoever is listed first on the ballot.
@@ -242,106 +335,312 @@ with open(args.file, "r") as csvfile:
         # at 2 and at 4. Or A - 1 and B - 2. We only care that A comes before B ordinally.
 
         # we can now strip out the actual ranks, the ordering is all that matters
-        # just get a list of candidate indices
-        ballot_choices = [x[0] for x in ballot_choices]
+        # just get an array of candidate indices (packed as C shorts, not a list of Python ints)
+        ballot_choices = array.array("h", [x[1] for x in ballot_choices])
+
+        new_rankings.append(ballot_choices)
+    return new_rankings
 
-        # initialize our ballot object
-        new_ballot = ballot.Ballot(timestamp, weight, ballot_choices)
 
-        ballots.append(new_ballot)  # add ballot to list
-    print(f"Created {len(ballots)} ballots.")
-    confirm = _confirm_yn("Does this seem alright?")
+def _assign_ballots(ballot_ids, weights: list, rankings: list, heads: list, remaining: list, buckets: dict, votes: dict):
+    """
+    Puts each ballot in ballot_ids into the bucket of its highest-ranked remaining candidate,
+    and adds the ballot's weight to that candidate's votes.
+
+    The search for each ballot b starts at heads[b], since every candidate ranked before it has
+    already been eliminated, and heads[b] is advanced to wherever the ballot lands. Ballots that
+    rank no remaining candidates are exhausted and are not put in any bucket.
+    Returns the total weight of the exhausted ballots.
+
+    weights : list := weights[b] is the weight of ballot b.
+    rankings : list := rankings[b] is the candidate rankings of ballot b.
+    heads : list := heads[b] is the position in rankings[b] of the candidate ballot b is voting for.
+    remaining : list := remaining[c] is True iff candidate c is still in the running.
+    buckets : dict := maps candidate_id -> list of ballots currently voting for them.
+    votes : dict := maps candidate_id -> total weight of the ballots in their bucket.
+    """
+    exhausted_mass = 0
+    for b in ballot_ids:
+        # read everything about this ballot into locals once
+        ranking = rankings[b]
+        ranking_len = len(ranking)
+        weight = weights[b]
+        head = heads[b]
+        # Looking at the highest ranked candidates first,
+        # skip past anyone who's been eliminated.
+        while head < ranking_len and not remaining[ranking[head]]:
+            head += 1
+        heads[b] = head
+        if head < ranking_len:
+            # give this ballot's vote to the first candidate still remaining.
+            candidate = ranking[head]
+            buckets[candidate].append(b)
+            votes[candidate] += weight
+        else:
+            exhausted_mass += weight
+    return exhausted_mass
+
+
+def _print_standings(votes: dict, candidates: list, weight_scale: int = config.WEIGHT_SCALE):
+    """
+    Prints each remaining candidate's votes, from most to fewest.
+    """
+    votes_desc = sorted(votes.items(), key=lambda pair: pair[1], reverse=True)
+    for i, (candidate_id, nvotes) in enumerate(votes_desc):
+        print(f"  {i+1}. {candidates[candidate_id]} with {_format_weight(nvotes, weight_scale)} votes.")
+
+
+def run_election(candidates: list, seats: int, ballot_weights: list, ballot_rankings: list, to_eliminate: list,
+                 rng: random.Random, break_ties: bool = False, quiet: bool = False, pause: bool = False,
+                 weight_scale: int = config.WEIGHT_SCALE):
+    """
+    Counts an election and returns the winning candidate ids, or None if it ended in a final-round tie
+    that break_ties did not allow to be settled by chance.
+
+    Works only on the ballots it's given, so it can be called once per office by other scripts.
+
+    candidates : list := candidate names, indexed by candidate id.
+    seats : int := how many seats to fill.
+    ballot_weights : list := ballot_weights[b] is the fixed-point weight of ballot b.
+    ballot_rankings : list := ballot_rankings[b] is ballot b's candidate ids, most preferred first.
+    to_eliminate : list := candidate ids to eliminate before counting starts.
+    rng : random.Random := seeded rng used to break ties for last place.
+    break_ties : bool := whether a final-round tie may be settled by chance.
+    quiet : bool := whether to skip printing the standings after every round.
+    pause : bool := whether to wait for enter between rounds.
+    weight_scale : int := how many units of ballot_weights make up one vote.
+    """
+    # ballots with identical rankings always vote identically, so they're merged into
+    # a single entry carrying their combined weight (a "preference profile").
+    # preemptively eliminated candidates are stripped out here once, rather than skipped every
+    # round, and ballots left empty are dropped since they can never count towards anyone.
+    elim_set = set(to_eliminate)
+    profile = {}
+    for weight, ranking in zip(ballot_weights, ballot_rankings):
+        key = tuple([c for c in ranking if c not in elim_set])
+        if len(key) == 0:
+            continue
+        profile[key] = profile.get(key, 0) + weight
+    weights = list(profile.values())
+    rankings = list(profile.keys())
+    if not quiet:
+        print(f"Counting {len(ballot_rankings)} ballots as {len(rankings)} distinct non-empty rankings.")
+        print()
+    # remaining[c] is True iff candidate c is still in the running.
+    # a flat list indexed by candidate id is cheaper to check in the tally loop than a set.
+    remaining = [True] * len(candidates)
+    for candidate_id in elim_set:
+        remaining[candidate_id] = False
+    num_remaining = remaining.count(True)
+    # every ballot starts out voting for its highest-ranked remaining candidate.
+    # after that, only the ballots of an eliminated candidate ever need to move,
+    # so the vote totals are kept up to date instead of recounted every round.
+    heads = [0] * len(rankings)
+    buckets = {x: [] for x, still_in in enumerate(remaining) if still_in}
+    # dict comprehension to create a dict of the form { candidate_id : num votes }
+    votes = {x: 0 for x in buckets}
+    total_mass = sum(weights)
+    exhausted_mass = _assign_ballots(range(len(rankings)), weights, rankings,
+                                     heads, remaining, buckets, votes)
+    count_round = 1
+    while num_remaining > seats:
+        # While there is still competition,
+        # ...the votes are kept up to date as ballots transfer.
+        # weights are exact fixed-point ints, so no vote can go missing along the way.
+        assert sum(votes.values()) + exhausted_mass == total_mass
+        if not quiet:
+            print(f"Round {count_round} results:")
+            _print_standings(votes, candidates, weight_scale)
+
+        leading_votes = heapq.nlargest(seats, votes.values())
+        # counting only ever eliminates, so a remaining candidate's votes never go down, and the
+        # candidates outside the top `seats` can never hold more than they do right now combined.
+        # so once the top `seats` candidates each have more votes than everyone below them combined,
+        # none of them can ever come last: the winners are decided and there is no need to count
+        # any further rounds. (this covers the Droop quota case, where `seats` candidates each hold
+        # over 1/(seats+1) of the total vote.)
+        if leading_votes[-1] > sum(votes.values()) - sum(leading_votes):
+            if not quiet:
+                print(
+                    f"The {seats} leading candidate(s) each have more votes than everyone below them combined, so the result is decided.")
+            for candidate_id, nvotes in votes.items():
+                if nvotes < leading_votes[-1]:
+                    remaining[candidate_id] = False
+            num_remaining = seats
+            break
+
+        # How many votes did the least popular candidate get?
+        # (a single pass over the totals; sorting is only needed for display)
+        least_num_votes = min(votes.values())
+        # Let's see how many candidates have this.
+        last_place_candidates = [
+            x for x, nvotes in votes.items() if nvotes == least_num_votes]
+
+        eliminate = None
+
+        if len(last_place_candidates) > 1:
+            # Tie for last!
+            if not quiet:
+                print(
+                    f"There is a {len(last_place_candidates)}-way tie for last place.")
+            # if there are more than (num_seats+1) candidates left, just break by chance.
+            # alternatively, always break by chance if user specified.
+            # basically, it's undesirable to have a final round decided by chance.
+            if num_remaining > (seats + 1) or break_ties:
+                if not quiet:
+                    print("We will choose one to eliminate by random chance.")
+                eliminate = rng.choice(last_place_candidates)
+            else:
+                # uh oh!
+                # breaking ties is disabled.
+                # and the last round has a tie.
+                print()
+                print("!!! THE ELECTION ENDED IN A TIE. !!!")
+                print(
+                    "  (Because --break-ties is not set, there is no way to resolve this tie.)")
+                print("The count stands as follows:")
+                # print the count
+                _print_standings(votes, candidates, weight_scale)
+
+                # no more counting
+                break
+        else:
+            eliminate = last_place_candidates[0]
+
+        if not quiet:
+            print(f"The candidate chosen for elimination was {candidates[eliminate]}.")
+            print("Removing them, and transferring their ballots...")
+        remaining[eliminate] = False
+        num_remaining -= 1
+        # hand the eliminated candidate's ballots (and votes) to their next remaining choice.
+        del votes[eliminate]
+        exhausted_mass += _assign_ballots(buckets.pop(eliminate), weights, rankings,
+                                          heads, remaining, buckets, votes)
+        count_round += 1
+        if pause:
+            input("Press enter to continue.")
+        if not quiet:
+            print()
+
+    # only report winners if we didn't end in a tie
+    if num_remaining > seats:
+        return None
+    return [x for x, still_in in enumerate(remaining) if still_in]
+
+
+def main():
+    """
+    Runs an election from the command line.
+    """
+    # --list-offices doesn't need anything else, so answer it before building the parser.
+    if "--list-offices" in sys.argv[1:]:
+        _print_banner()
+        _list_offices()
+        return
+
+    args = _build_parser().parse_args()
+
+    _print_banner()
+
+    if args.list_offices:
+        # (the flag was abbreviated, which only argparse understands)
+        _list_offices()
+        return
+
+    seed = args.seed
+    if seed is None:
+        # if the user hasn't specified a seed, just come up with one randomly
+        seed = random.randrange(sys.maxsize)
+
+    rng = random.Random(seed)  # initialize an rng using this seed
+    print(f"(Using random seed {seed})")
+
+    if args.file is None:
+        print(
+            f"FATAL: Input file is requried to run election (try {sys.argv[0]} --help)")
+        sys.exit(1)
+
+    if args.office is None:
+        print(
+            f"FATAL: An office is required to run election (try {sys.argv[0]} --help)")
+        sys.exit(1)
+
+    seats = offices.OFFICES[args.office]
+    assert isinstance(seats, int)
+
+    print(f"Running an election for {args.office}, which has {seats} seat(s) up for election.")
+
+    print("Reading election data...")
+    headers, rows = _read_csv(args.file)
+    # Extract candidate names by looking at the column headers.
+    print("Detecting candidates...")
+    candidates = _extract_candidates(headers)
+
+    print(f"Detected {len(candidates)} candidates:")
+    for i, candidate in enumerate(candidates):
+        print(f"    {i+1}. ", candidate)
+    confirm = _confirm_yn("Is this correct?", args.y)
+    if not confirm:
+        print("Exiting...")
+        sys.exit(1)
+
+    print("Initializing ballots...")
+    # ballots are kept as parallel lists: ballot_rankings[b] and ballot_weights[b] describe ballot b.
+    ballot_rankings = _build_rankings(rows)
+    ballot_weights = [config.WEIGHT_SCALE] * len(ballot_rankings)  # one full vote each
+    print(f"Created {len(ballot_rankings)} ballots.")
+    confirm = _confirm_yn("Does this seem alright?", args.y)
     if not confirm:
         print("Exiting...")
         sys.exit(1)
 
     # check for empty ballots
-    empty_ballots = len([x for x in ballots if len(x.rankings) == 0])
+    empty_ballots = len([x for x in ballot_rankings if len(x) == 0])
     if empty_ballots > 0:
         print(f"WARNING: Detected {empty_ballots} empty ballots.")
-        confirm = _confirm_yn("Does this seem alright?")
+        confirm = _confirm_yn("Does this seem alright?", args.y)
         if not confirm:
             print("Exiting...")
             sys.exit(1)
 
-# "mass" is the sum of the weights of non-empty ballots
-# represents the total voting power of the club, used for computing exec's vote weight
-# count of non-empty ballots
-real_mass = sum([x.weight for x in ballots if len(x.rankings) > 0])
+    # "mass" is the sum of the weights of non-empty ballots
+    # represents the total voting power of the club, used for computing exec's vote weight
+    # count of non-empty ballots
+    real_mass = sum([weight for weight, ranking in zip(ballot_weights, ballot_rankings)
+                     if len(ranking) > 0])
 
-print(f"Detected a total club 'voting mass' of {real_mass}")
+    print(f"Detected a total club 'voting mass' of {_format_weight(real_mass)}")
+    # how many units of ballot_weights make up one vote.
+    weight_scale = config.WEIGHT_SCALE
 
-# should we count special exec supervotes?
-if args.exec_votes != None:
-    print("Reading exec data...")
-    # we need to count exec votes
-    with open(args.exec_votes, "r") as exec_csv:
-        reader = csv.reader(exec_csv)
+    # should we count special exec supervotes?
+    if args.exec_votes != None:
+        print("Reading exec data...")
+        # we need to count exec votes
         # get the headers from the google forms responses
-        headers = next(reader)
+        headers, rows = _read_csv(args.exec_votes)
 
-        exec_candidates = []
         print("Detecting candidates in exec ballot...")
-        for i, col in enumerate(headers[1:]):  # skip first col (timestamp)
-            match = CANDIDATE_REGEX.findall(col)
-            if len(match) == 0:
-                print(
-                    f"FATAL: Failed to extract candidate from header for column {i + 2}.")
-                sys.exit(1)
-            else:
-                exec_candidates.append(match[0])
+        exec_candidates = _extract_candidates(headers)
 
         if exec_candidates != candidates:
             print("FATAL: Exec file's candidates do not match input file's candidates")
             sys.exit(1)
 
-        exec_ballots = []
-        for i, row in enumerate(reader):
-            i += 1  # increment i because we skipped the header
-            timestamp = row[0]  # extract the ballot timestamp
-
-            ballot_choices = []  # populate their ballot ranking
-            for candidate_index, candidate_response in enumerate(row[1:]):
-                # if they specified no preference, then it's no big deal
-                if candidate_response.lower() == config.NO_PREFERENCE_RESPONSE.lower():
-                    continue  # skip ranking this candidate
-
-                match = ORDINAL_REGEX.findall(candidate_response)
-                if len(match) == 0:
-                    # this candidate was not ranked
-                    # (or there was an error in how the form was processed)
-                    continue  # skip ranking this candidate
-                else:
-                    rank = int(match[0])  # convert their rank to a number
-                    # append like (candidate_id, ranking)
-                    ballot_choices.append((candidate_index, int(rank)))
-
-            # sort ballot choices in ascending order by rank
-            # sort by second entry in tuple - their rank
-            ballot_choices.sort(key=lambda x: x[1])
-
-            # we can now strip out the actual ranks, the ordering is all that matters
-            # just get a list of candidate indices
-            ballot_choices = [x[0] for x in ballot_choices]
-
-            # NOTE: temporarily setting ballot weight to 0.0, as we need to calculate later
-            # initialize our ballot object
-            new_ballot = ballot.Ballot(timestamp, 0.0, ballot_choices)
-
-            # add to list of exec ballots
-            exec_ballots.append(new_ballot)
-
-        print(f"Created {len(exec_ballots)} exec superballots.")
-        confirm = _confirm_yn("Does this seem alright?")
+        # NOTE: exec ballot weight is calculated later
+        exec_rankings = _build_rankings(rows)
+
+        print(f"Created {len(exec_rankings)} exec superballots.")
+        confirm = _confirm_yn("Does this seem alright?", args.y)
         if not confirm:
             print("Exiting...")
             sys.exit(1)
 
-        empty_exec_ballots = len([x for x in ballots if len(x.rankings) == 0])
+        empty_exec_ballots = len([x for x in exec_rankings if len(x) == 0])
         if empty_exec_ballots > 0:
             print(
                 f"WARNING: Detected {empty_exec_ballots} empty exec ballots.")
-            confirm = _confirm_yn("Does this seem alright?")
+            confirm = _confirm_yn("Does this seem alright?", args.y)
             if not confirm:
                 print("Exiting...")
                 sys.exit(1)
@@ -351,146 +650,88 @@ if args.exec_votes != None:
         # if we have k exec votes and "regular" vote mass of n, then exec gets
         # a weight of n / k. That way, the total mass of exec votes
         # is equal to that of the club.
-        exec_votes = Decimal(len(exec_ballots))
-        exec_weight = real_mass / exec_votes
-        print(f"Calculated exec vote weight of {exec_weight}")
-
-        for exec_ballot in exec_ballots:
-            exec_ballot.weight = exec_weight
-
-        exec_mass = sum([x.weight for x in exec_ballots])
-        print(f"Exec votes have mass of {exec_mass}.")
+        # n / k rarely divides evenly, so instead every weight is counted in units k times
+        # smaller: club ballots are scaled up by k, and each exec ballot then weighs
+        # exactly n (in the old units), with nothing rounded away.
+        exec_votes = len(exec_rankings)
+        ballot_weights = [weight * exec_votes for weight in ballot_weights]
+        weight_scale *= exec_votes
+        exec_weight = real_mass
+        real_mass *= exec_votes
+        print(f"Calculated exec vote weight of {_format_weight(exec_weight, weight_scale)}")
+
+        exec_mass = exec_weight * exec_votes
+        print(f"Exec votes have mass of {_format_weight(exec_mass, weight_scale)}.")
+        assert exec_mass == real_mass
 
         # add exec votes to general pool
-        ballots = ballots + exec_ballots
-
-to_eliminate = args.elim if args.elim is not None else []
-
-# check if any candidates need to be preemptively eliminated.
-# context: in Club Running electoral process, the races happen in
-# a defined order. If someone is running in two races,
-# and they win the earlier race, they are automatically
-# withdrawn from subsequent races.
-if args.elim is None:
-    eliminate = _confirm_yn(
-        "Do any candidates need to be eliminated?", invert_flag=True)
-    if eliminate:
-        candidate_indices = input("Enter their numbers: ")
-        candidate_indices = [x.strip() for x in candidate_indices.split(",")]
-        for candidate_index in candidate_indices:
-            candidate_index = int(candidate_index) - 1
-            to_eliminate.append(candidate_index)
+        ballot_rankings += exec_rankings
+        ballot_weights += [exec_weight] * exec_votes
+
+    to_eliminate = args.elim if args.elim is not None else []
+
+    # check if any candidates need to be preemptively eliminated.
+    # context: in Club Running electoral process, the races happen in
+    # a defined order. If someone is running in two races,
+    # and they win the earlier race, they are automatically
+    # withdrawn from subsequent races.
+    if args.elim is None:
+        eliminate = _confirm_yn(
+            "Do any candidates need to be eliminated?", args.y, invert_flag=True)
+        if eliminate:
+            candidate_indices = input("Enter their numbers: ")
+            candidate_indices = [x.strip() for x in candidate_indices.split(",")]
+            for candidate_index in candidate_indices:
+                candidate_index = int(candidate_index) - 1
+                to_eliminate.append(candidate_index)
+            print("Candidates to be eliminated:")
+            for i in to_eliminate:
+                print(f"    - {candidates[i]}")
+            confirm_elim = _confirm_yn("Is this correct?", args.y)
+            if not confirm_elim:
+                print("Exiting...")
+                sys.exit(1)
+    else:
+        to_eliminate = [x - 1 for x in args.elim]  # 1-indexed
         print("Candidates to be eliminated:")
         for i in to_eliminate:
             print(f"    - {candidates[i]}")
-        confirm_elim = _confirm_yn("Is this correct?")
+        confirm_elim = _confirm_yn("Is this correct?", args.y)
         if not confirm_elim:
             print("Exiting...")
             sys.exit(1)
-else:
-    to_eliminate = [x - 1 for x in args.elim]  # 1-indexed
-    print("Candidates to be eliminated:")
-    for i in to_eliminate:
-        print(f"    - {candidates[i]}")
-    confirm_elim = _confirm_yn("Is this correct?")
-    if not confirm_elim:
-        print("Exiting...")
-        sys.exit(1)
 
-print("Beginning ballot counting process...")
-print()
-# if we have 3 candidates, this will be [0,1,2], corresponding to each candidate remaining.
-remaining_candidates = set(range(len(candidates))) - set(to_eliminate)
-count_round = 1
-while len(remaining_candidates) > seats:
-    print(f"Begin counting votes for round {count_round}...")
-    # While there is still competition,
-    # ...count the votes.
-    # dict comprehension to create a dict of the form { candidate_id : num votes }
-    votes = {x: Decimal("0.0") for x in remaining_candidates}
-    for ballot in ballots:
-        # Get the highest-ranked still-remaining candidate.
-        for candidate in ballot.rankings:
-            # Looking at the highest ranked candidates first,
-            # See if they're still remaining.
-            if candidate in remaining_candidates:
-                # If so, give them a vote.
-                votes[candidate] += ballot.weight
-                break  # And stop voting.
-    print(f"Done counting votes for round {count_round}.")
-    print("Here are the results:")
-    votes_desc = sorted(votes.items(), key=lambda pair: pair[1], reverse=True)
-    for i, (candidate_id, nvotes) in enumerate(votes_desc):
-        print(f"  {i+1}. {candidates[candidate_id]} with {nvotes} votes.")
+    print("Beginning ballot counting process...")
+    winners = run_election(candidates, seats, ballot_weights, ballot_rankings, to_eliminate, rng,
+                           break_ties=args.break_ties, quiet=args.quiet, pause=args.pause,
+                           weight_scale=weight_scale)
+    print()
+    print("Done counting!")
 
-    # How many votes did the least popular candidate get?
-    least_num_votes = votes_desc[-1][1]
-    # Let's see how many candidates have this.
-    last_place_candidates = [
-        x for x in remaining_candidates if votes[x] == least_num_votes]
+    # only print winners if we didn't end in a tie
+    if winners is not None:
+        print(f"There are {len(winners)} winner(s). They are:")
+        for candidate_id in winners:
+            print(f"  ", candidates[candidate_id])
 
-    eliminate = None
+        print(f"Congratulations to our new {args.office}(s)!")
 
-    if len(last_place_candidates) > 1:
-        # Tie for last!
-        print(
-            f"There is a {len(last_place_candidates)}-way tie for last place.")
-        # if there are more than (num_seats+1) candidates left, just break by chance.
-        # alternatively, always break by chance if user specified.
-        # basically, it's undesirable to have a final round decided by chance.
-        if len(remaining_candidates) > (seats + 1) or args.break_ties:
-            print("We will choose one to eliminate by random chance.")
-            eliminate = rng.choice(last_place_candidates)
-        else:
-            # uh oh!
-            # breaking ties is disabled.
-            # and the last round has a tie.
-            print()
-            print("!!! THE ELECTION ENDED IN A TIE. !!!")
-            print(
-                "  (Because --break-ties is not set, there is no way to resolve this tie.)")
-            print("The count stands as follows:")
-            # print the count
-            for i, (candidate_id, nvotes) in enumerate(votes_desc):
-                print(
-                    f"  {i+1}. {candidates[candidate_id]} with {nvotes} votes.")
-
-            # no more counting
-            break
-    else:
-        eliminate = last_place_candidates[0]
-
-    print(f"The candidate chosen for elimination was {candidates[eliminate]}.")
-    print("Removing them, and recounting votes...")
-    remaining_candidates.remove(eliminate)
-    count_round += 1
-    if args.pause:
-        input("Press enter to continue.")
     print()
+    print("Reproducibility:")
+    print("You should be able to reproduce these election results by running:")
 
-print()
-print("Done counting!")
+    to_eliminate_disp = [str(x + 1)
+                         for x in to_eliminate]  # make to_eliminate 1-indexed
+    # don't show --elim flag if no one was eliminated
+    elim_disp = f"--elim {' '.join(to_eliminate_disp)}" if len(
+        to_eliminate) > 0 else ""
 
-# only print winners if we didn't end in a tie
-if len(remaining_candidates) <= seats:
-    print(f"There are {len(remaining_candidates)} winner(s). They are:")
-    for candidate_id in remaining_candidates:
-        print(f"  ", candidates[candidate_id])
+    exec_disp = f"--exec-votes \"{args.exec_votes}\"" if args.exec_votes != None else ""
 
-    print(f"Congratulations to our new {args.office}(s)!")
-
-print()
-print("Reproducibility:")
-print("You should be able to reproduce these election results by running:")
-
-to_eliminate_disp = [str(x + 1)
-                     for x in to_eliminate]  # make to_eliminate 1-indexed
-# don't show --elim flag if no one was eliminated
-elim_disp = f"--elim {' '.join(to_eliminate_disp)}" if len(
-    to_eliminate) > 0 else ""
+    print(
+        f"    python {sys.argv[0]} -y --seed {seed} \"{args.file}\" {args.office} {elim_disp} {exec_disp}")
+    print()
 
-exec_disp = f"--exec-votes \"{args.exec_votes}\"" if args.exec_votes != None else ""
 
-print(
-    f"    python {sys.argv[0]} -y --seed {seed} \"{args.file}\" {args.office} {elim_disp} {exec_disp}")
-print()
+if __name__ == "__main__":
+    main()
@@ -2,53 +2,21 @@
 Python module listing the elected offices and their number of seats.
 """
 
-from decimal import Decimal
-
 # Maps office:str -> seats:int
 OFFICES = {
-    "president": {
-        "num_seats": 1, # how many seats to fill for this office?
-    },
-    "vice_president": {
-        "num_seats": 1, 
-    },
-    "treasurer": {
-        "num_seats": 1, 
-    },
-    "mens_workout_coordinator": {
-        "num_seats": 1, 
-    },
-    "womens_workout_coordinator": {
-        "num_seats": 1, 
-    },
-    "sprint_coordinator": {
-        "num_seats": 1, 
-    },
-    "meet_coordinator": {
-        "num_seats": 2,
-    },
-    "mens_social_chair": {
-        "num_seats": 1, 
-    },
-    "womens_social_chair": {
-        "num_seats": 1, 
-    },
-    "fundraising_chair": {
-        "num_seats": 1, 
-    },
-    "webmaster": {
-        "num_seats": 1, 
-    },
-    "mens_recruitment_chair": {
-        "num_seats": 1, 
-    },
-    "womens_recruitment_chair": {
-        "num_seats": 1, 
-    },
-    "secretary": {
-        "num_seats": 1, 
-    },
-    "team_relations_chair": {
-        "num_seats": 1, 
-    }
+    "president": 1,
+    "vice_president": 1,
+    "treasurer": 1,
+    "mens_workout_coordinator": 1,
+    "womens_workout_coordinator": 1,
+    "sprint_coordinator": 1,
+    "meet_coordinator": 2,
+    "mens_social_chair": 1,
+    "womens_social_chair": 1,
+    "fundraising_chair": 1,
+    "webmaster": 1,
+    "mens_recruitment_chair": 1,
+    "womens_recruitment_chair": 1,
+    "secretary": 1,
+    "team_relations_chair": 1
 }
\ No newline at end of file